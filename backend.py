@@ -5,27 +5,328 @@ Handles retries via idempotency keys. Uses integer paise for money to avoid
 floating-point precision errors.
 """
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+import orjson
+import atexit
+import calendar
+import math
+import queue
+import re
 import sqlite3
 import hashlib
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+
+class _OrjsonProvider(JSONProvider):
+    """Serve jsonify() and request.get_json() through orjson's C encoder/decoder.
+
+    Mirrors Flask's default provider: keys are sorted unless ``sort_keys`` is
+    False, and responses are indented when ``compact`` is False (or None in
+    debug mode). dumps() honours ``indent`` (always rendered as two spaces),
+    ``sort_keys`` and ``default``; other json.dumps keywords such as
+    ``separators`` or ``ensure_ascii`` are ignored because orjson has no
+    equivalent.
+    """
+
+    mimetype = 'application/json'
+    sort_keys = True
+    compact = None
+
+    def _encode(self, obj, indent=None, sort_keys=False, default=None, **kwargs):
+        option = 0
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        # Fall back to Flask's handling of dates, Decimals, dataclasses, etc.
+        return orjson.dumps(obj, default=default or DefaultJSONProvider.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return self._encode(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if args and kwargs:
+            raise TypeError('app.json.response() takes either args or kwargs, not both')
+        if not args and not kwargs:
+            obj = None
+        elif len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._encode(obj, indent=indent, sort_keys=self.sort_keys),
+            mimetype=self.mimetype,
+        )
+
 
 app = Flask(__name__)
-CORS(app)
+app.json = _OrjsonProvider(app)
 DATABASE = 'expenses.db'
 
+# Schema setup runs once per process; request handlers call init_db() as a
+# cheap guard so gunicorn workers (where __main__ doesn't run) still get tables.
+_SCHEMA_READY = False
+_SCHEMA_LOCK = threading.Lock()
 
-def get_db():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
+# Pool of long-lived connections instead of reconnecting per request. Each
+# app context checks one out on first use (opening a new one if none is idle)
+# and returns it on teardown. Only idle connections are capped at _POOL_SIZE;
+# extras opened under a burst of concurrent requests are closed on return.
+# Connections run in autocommit mode; writers open transactions explicitly.
+_POOL_SIZE = 8
+_POOL = queue.LifoQueue(maxsize=_POOL_SIZE)
+# Bumped by _reset_pool() so connections checked out before a reset are closed
+# on return rather than pooled against a stale DATABASE.
+_POOL_GENERATION = 0
+# SQLite allows one writer at a time; serialize this process's writers up front.
+_WRITE_LOCK = threading.Lock()
+
+# Applied once per connection: WAL lets reads proceed during writes and, with
+# synchronous=NORMAL, defers fsync to checkpoints instead of every commit.
+_CONNECTION_PRAGMAS = '''
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-64000;
+'''
+
+# Background upkeep: checkpointing keeps the -wal file from growing without
+# bound in a long-running process; a bounded ANALYZE refreshes planner statistics.
+_CHECKPOINT_INTERVAL = 60
+_OPTIMIZE_INTERVAL = 3600
+# Set to stop the running maintenance thread; it is bound to one DATABASE path.
+_MAINTENANCE_STOP = None
+
+# Hot-path SQL lives at module scope so each request reuses the same strings
+# and hits sqlite3's prepared-statement cache instead of re-parsing.
+_STATEMENT_CACHE_SIZE = 256
+_EXPENSE_COLUMNS = 'id, amount_paise, category, description, date, created_at'
+_SQL_SELECT_BY_IDEMPOTENCY_KEY = '''
+    SELECT e.id, e.amount_paise, e.category, e.description, e.date, e.created_at
+    FROM expenses e
+    JOIN idempotency_keys k ON k.expense_id = e.id
+    WHERE k.idempotency_key = ?
+'''
+_SQL_INSERT_EXPENSE = f'''
+    INSERT INTO expenses (amount_paise, category, description, date, created_at)
+    VALUES (?, ?, ?, ?, ?)
+    RETURNING {_EXPENSE_COLUMNS}
+'''
+_SQL_INSERT_IDEMPOTENCY_KEY = '''
+    INSERT OR IGNORE INTO idempotency_keys (idempotency_key, expense_id, created_at)
+    VALUES (?, ?, ?)
+'''
+_SQL_INSERT_EXPENSE_NO_RETURNING = '''
+    INSERT INTO expenses (amount_paise, category, description, date, created_at)
+    VALUES (?, ?, ?, ?, ?)
+'''
+# Bulk key lookups bind BLOB keys in fixed-size IN (...) chunks; only the final
+# partial chunk has a different SQL string, so the statement cache stays warm.
+_KEY_LOOKUP_CHUNK = 100
+_SQL_SELECT_BY_IDEMPOTENCY_KEYS = '''
+    SELECT k.idempotency_key, e.id, e.amount_paise, e.category, e.description, e.date, e.created_at
+    FROM idempotency_keys k
+    JOIN expenses e ON e.id = k.expense_id
+    WHERE k.idempotency_key IN ({})
+'''
+_SQL_MAX_EXPENSE_ID = 'SELECT COALESCE(MAX(id), 0) FROM expenses'
+_SQL_SELECT_EXPENSES_AFTER_ID = f'SELECT {_EXPENSE_COLUMNS} FROM expenses WHERE id > ? ORDER BY id'
+# Rows serialized per chunk when streaming GET /expenses.
+_STREAM_BATCH_SIZE = 500
+
+
+def _list_expenses_sql(by_category, ascending, by_search):
+    """Build one GET /expenses query variant; all are precomputed below."""
+    where = []
+    if by_category:
+        where.append('category = ?')
+    if by_search:
+        where.append('id IN (SELECT rowid FROM expenses_fts WHERE expenses_fts MATCH ?)')
+    order = 'ASC' if ascending else 'DESC'
+    query = f'SELECT {_EXPENSE_COLUMNS} FROM expenses'
+    if where:
+        query += ' WHERE ' + ' AND '.join(where)
+    return query + f' ORDER BY date {order}, created_at {order}'
+
+
+# GET /expenses variants keyed by (filter_by_category, ascending, search_description).
+_SQL_LIST_EXPENSES = {
+    (c, a, q): _list_expenses_sql(c, a, q)
+    for c in (False, True) for a in (False, True) for q in (False, True)
+}
+
+
+def _connect():
+    conn = sqlite3.connect(
+        DATABASE,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=_STATEMENT_CACHE_SIZE,
+    )
+    conn.executescript(_CONNECTION_PRAGMAS)
     return conn
 
 
-def init_db():
-    with get_db() as conn:
+def get_db():
+    """Return the current app context's pooled connection, checking one out on first use."""
+    if 'db' not in g:
+        try:
+            conn = _POOL.get_nowait()
+        except queue.Empty:
+            conn = _connect()
+        g.db = conn
+        g.db_generation = _POOL_GENERATION
+    return g.db
+
+
+def _return_connection(conn, generation):
+    """Put a checked-out connection back in the pool, or close it if stale or surplus."""
+    if conn.in_transaction:
+        conn.rollback()
+    if generation != _POOL_GENERATION:
+        conn.close()
+        return
+    try:
+        _POOL.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+@app.teardown_appcontext
+def _release_db(exc):
+    """Return the context's connection to the pool at the end of the request."""
+    conn = g.pop('db', None)
+    generation = g.pop('db_generation', None)
+    if conn is not None:
+        _return_connection(conn, generation)
+
+
+@contextmanager
+def _write_transaction():
+    """Run a BEGIN IMMEDIATE transaction on the context's connection, yielding a cursor.
+
+    Writers in this process queue on _WRITE_LOCK rather than spinning in
+    SQLite's busy handler; other processes still wait via the busy timeout.
+    """
+    conn = get_db()
+    with _WRITE_LOCK:
         cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def _reset_pool():
+    """Close idle pooled connections, stop maintenance and forget schema state.
+
+    Used when DATABASE changes (e.g. in tests). Connections still checked out
+    are closed when their app context ends.
+    """
+    global _SCHEMA_READY, _POOL_GENERATION
+    _stop_maintenance()
+    _POOL_GENERATION += 1
+    while True:
+        try:
+            _POOL.get_nowait().close()
+        except queue.Empty:
+            break
+    _SCHEMA_READY = False
+
+
+atexit.register(_reset_pool)
+
+
+def init_db():
+    global _SCHEMA_READY
+    if _SCHEMA_READY:
+        return
+    with _SCHEMA_LOCK:
+        if _SCHEMA_READY:
+            return
+        # init_db() also runs outside requests (startup, tests), so give the
+        # schema setup its own app context to check a connection out of.
+        with app.app_context():
+            _create_schema()
+        _SCHEMA_READY = True
+        _start_maintenance()
+
+
+def _run_maintenance(optimize=False, database=None):
+    """Checkpoint and truncate the WAL, optionally refreshing planner statistics.
+
+    Runs without the writer lock (WAL checkpoints are safe alongside writers)
+    and with no busy timeout, so a checkpoint blocked by an open reader is
+    skipped until the next pass instead of stalling requests.
+    """
+    path = Path(database or DATABASE).absolute()
+    # mode=rw never creates the file, so a stale path is skipped, not recreated.
+    conn = sqlite3.connect(f'{path.as_uri()}?mode=rw', uri=True, timeout=0, isolation_level=None)
+    try:
+        if optimize:
+            # PRAGMA optimize only analyzes tables the connection itself has
+            # queried, which a fresh connection hasn't; run a bounded ANALYZE.
+            # It goes first so its writes are included in the checkpoint.
+            conn.execute('PRAGMA analysis_limit=400')
+            conn.execute('ANALYZE')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+
+
+def _maintenance_loop(database, stop):
+    elapsed = 0
+    while not stop.wait(_CHECKPOINT_INTERVAL):
+        elapsed += _CHECKPOINT_INTERVAL
+        optimize = elapsed >= _OPTIMIZE_INTERVAL
+        if optimize:
+            elapsed = 0
+        try:
+            _run_maintenance(optimize, database)
+        except sqlite3.Error:
+            app.logger.exception('SQLite maintenance failed')
+
+
+def _start_maintenance():
+    """Start the background maintenance thread for the current DATABASE."""
+    global _MAINTENANCE_STOP
+    if _MAINTENANCE_STOP is not None:
+        return
+    _MAINTENANCE_STOP = threading.Event()
+    threading.Thread(
+        target=_maintenance_loop,
+        args=(DATABASE, _MAINTENANCE_STOP),
+        name='sqlite-maintenance',
+        daemon=True,
+    ).start()
+
+
+def _stop_maintenance():
+    global _MAINTENANCE_STOP
+    if _MAINTENANCE_STOP is not None:
+        _MAINTENANCE_STOP.set()
+        _MAINTENANCE_STOP = None
+
+
+def _create_schema():
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
         cursor.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name='expenses'"
         )
@@ -47,14 +348,51 @@ def init_db():
                 created_at TEXT NOT NULL
             )
         ''')
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='expenses_fts'"
+        )
+        needs_fts_rebuild = cursor.fetchone() is None
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS idempotency_keys (
-                idempotency_key TEXT PRIMARY KEY,
+                idempotency_key BLOB PRIMARY KEY,
                 expense_id INTEGER NOT NULL,
                 created_at TEXT NOT NULL,
                 FOREIGN KEY (expense_id) REFERENCES expenses(id)
             )
         ''')
+        # Cover GET /expenses filter + sort so neither needs a scan or temp sort.
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_expenses_cat_date
+            ON expenses (category, date DESC, created_at DESC)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_expenses_date
+            ON expenses (date DESC, created_at DESC)
+        ''')
+        # Full-text index over descriptions, kept in sync with expenses by
+        # triggers, so description search is an index lookup rather than LIKE.
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts
+            USING fts5(description, content='expenses', content_rowid='id')
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS expenses_fts_ai AFTER INSERT ON expenses BEGIN
+                INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS expenses_fts_ad AFTER DELETE ON expenses BEGIN
+                INSERT INTO expenses_fts (expenses_fts, rowid, description)
+                VALUES ('delete', old.id, old.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS expenses_fts_au AFTER UPDATE ON expenses BEGIN
+                INSERT INTO expenses_fts (expenses_fts, rowid, description)
+                VALUES ('delete', old.id, old.description);
+                INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description);
+            END
+        ''')
         if needs_migration:
             cursor.execute('''
                 INSERT INTO expenses (id, amount_paise, category, description, date, created_at)
@@ -63,116 +401,254 @@ def init_db():
                 FROM expenses_old
             ''')
             cursor.execute('DROP TABLE expenses_old')
+        if needs_fts_rebuild:
+            cursor.execute("INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')")
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# Largest value SQLite can store in an INTEGER column.
+_MAX_PAISE = 2 ** 63 - 1
 
 
 def _parse_amount(value):
     """Parse amount to paise (integer). Rejects negative and invalid values."""
     if value is None:
         return None, 'Amount is required'
-    try:
-        # Support both string and number input
-        if isinstance(value, (int, float)):
-            dec = Decimal(str(value))
-        else:
+    # Fast paths: ints, floats with at most two decimals, and integer strings
+    # skip Decimal entirely. Anything else falls through to exact parsing.
+    paise = None
+    if isinstance(value, bool):
+        return None, 'Amount must be a valid number'
+    if isinstance(value, int):
+        paise = value * 100
+    elif isinstance(value, float):
+        if not math.isfinite(value):
+            return None, 'Amount must be a valid number'
+        scaled = value * 100
+        rounded = round(scaled)
+        if abs(scaled - rounded) < 1e-6:
+            paise = rounded
+    elif isinstance(value, str):
+        try:
+            paise = int(value.strip()) * 100
+        except ValueError:
+            pass
+    if paise is None:
+        try:
             dec = Decimal(str(value).strip())
-        if dec < 0:
-            return None, 'Amount must be non-negative'
-        # Round to 2 decimal places, then convert to paise
-        dec = dec.quantize(Decimal('0.01'))
-        paise = int(dec * 100)
-        return paise, None
-    except (InvalidOperation, ValueError, TypeError):
+            if dec < 0:
+                return None, 'Amount must be non-negative'
+            # Round to 2 decimal places, then convert to paise
+            paise = int(dec.quantize(Decimal('0.01')) * 100)
+        except (InvalidOperation, ValueError, TypeError):
+            return None, 'Amount must be a valid number'
+    if paise < 0:
+        return None, 'Amount must be non-negative'
+    if paise > _MAX_PAISE:
         return None, 'Amount must be a valid number'
+    return paise, None
+
+
+# [0-9] rather than \d: \d also matches non-ASCII digits, which int() accepts.
+_DATE_RE = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})')
+
+
+def _is_valid_date(value):
+    """Check a YYYY-MM-DD string names a real calendar day (cheaper than strptime)."""
+    m = _DATE_RE.fullmatch(value)
+    if not m:
+        return False
+    year, month, day = int(m[1]), int(m[2]), int(m[3])
+    return year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
 
 
 def _row_to_expense(row):
-    """Convert DB row to API response object. Amount in rupees."""
+    """Convert DB row (in _EXPENSE_COLUMNS order) to API response object. Amount in rupees."""
+    id_, amount_paise, category, description, date, created_at = row
     return {
-        'id': row['id'],
-        'amount': row['amount_paise'] / 100,
-        'category': row['category'],
-        'description': row['description'],
-        'date': row['date'],
-        'created_at': row['created_at'],
+        'id': id_,
+        'amount': amount_paise / 100,
+        'category': category,
+        'description': description,
+        'date': date,
+        'created_at': created_at,
     }
 
 
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f]')
+
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    # FTS5's tokenizer rejects control characters such as NUL even when quoted.
+    terms = _CONTROL_CHARS_RE.sub(' ', text).split()
+    return ' '.join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+
+def _utc_timestamp():
+    """Current UTC time as ISO 8601 with a trailing Z, formatted in one pass."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
 def _get_idempotency_key():
-    """Get idempotency key from header or derive from request body for retries."""
-    key = request.headers.get('Idempotency-Key')
+    """Get idempotency key from header or derive from request body for retries.
+
+    Keys are 16-byte BLAKE2b digests stored as BLOBs, so header-provided keys
+    of any length share one compact fixed-size form in the index.
+    """
+    key = (request.headers.get('Idempotency-Key') or '').strip()
     if key:
-        return key.strip()
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
     # Fallback: hash of request body for identical retries (e.g. page reload resubmit)
-    body = request.get_data(as_text=True)
+    body = request.get_data(cache=True, as_text=False)
     if body:
-        return hashlib.sha256(body.encode()).hexdigest()
+        return hashlib.blake2b(body, digest_size=16).digest()
     return None
 
 
+def _clean_str(data, key):
+    """Stripped string field. Missing/None gives ''; any other non-string is an error."""
+    value = data.get(key)
+    if value is None:
+        return '', None
+    if not isinstance(value, str):
+        return None, f'{key.capitalize()} must be a string'
+    return value.strip(), None
+
+
+def _validate_expense(data):
+    """Validate one expense payload. Returns ((paise, category, description, date), error)."""
+    amount_paise, amount_err = _parse_amount(data.get('amount'))
+    if amount_err:
+        return None, amount_err
+    fields = []
+    for key in ('category', 'description', 'date'):
+        value, err = _clean_str(data, key)
+        if err:
+            return None, err
+        fields.append(value)
+    category, description, date = fields
+
+    if not category:
+        return None, 'Category is required'
+    if not date:
+        return None, 'Date is required'
+    if not _is_valid_date(date):
+        return None, 'Date must be in YYYY-MM-DD format'
+    return (amount_paise, category, description, date), None
+
+
+@app.after_request
+def _cors(response):
+    # Static headers instead of Flask-CORS: the API serves a single public UI.
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET,POST,OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Idempotency-Key'
+    return response
+
+
+@app.route('/expenses', methods=['OPTIONS'])
+@app.route('/expenses/bulk', methods=['OPTIONS'])
+def preflight():
+    return '', 204
+
+
 @app.route('/expenses', methods=['POST'])
 def create_expense():
     # When deployed (e.g. via gunicorn), __main__ doesn't run.
-    # Ensure tables exist before handling requests.
+    # Ensure tables exist before handling requests (no-op after the first call).
     init_db()
     data = request.get_json(force=True, silent=True)
     if not data:
         return jsonify({'error': 'Invalid JSON'}), 400
 
-    amount_raw = data.get('amount')
-    category = (data.get('category') or '').strip()
-    description = (data.get('description') or '').strip()
-    date = (data.get('date') or '').strip()
-
-    # Validation
-    amount_paise, amount_err = _parse_amount(amount_raw)
-    if amount_err:
-        return jsonify({'error': amount_err}), 400
-    if not category:
-        return jsonify({'error': 'Category is required'}), 400
-    if not date:
-        return jsonify({'error': 'Date is required'}), 400
-    try:
-        datetime.strptime(date, '%Y-%m-%d')
-    except ValueError:
-        return jsonify({'error': 'Date must be in YYYY-MM-DD format'}), 400
+    fields, err = _validate_expense(data)
+    if err:
+        return jsonify({'error': err}), 400
+    amount_paise, category, description, date = fields
 
     idempotency_key = _get_idempotency_key()
-    created_at = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    created_at = _utc_timestamp()
 
-    with get_db() as conn:
-        cursor = conn.cursor()
+    # Take the write lock before the key lookup so concurrent identical retries
+    # serialize here instead of both missing the key and inserting twice.
+    with _write_transaction() as cursor:
+        row = None
         if idempotency_key:
+            cursor.execute(_SQL_SELECT_BY_IDEMPOTENCY_KEY, (idempotency_key,))
+            row = cursor.fetchone()
+        if row is None:
             cursor.execute(
-                'SELECT expense_id FROM idempotency_keys WHERE idempotency_key = ?',
-                (idempotency_key,)
+                _SQL_INSERT_EXPENSE,
+                (amount_paise, category, description, date, created_at)
             )
-            existing = cursor.fetchone()
-            if existing:
+            row = cursor.fetchone()
+            if idempotency_key:
                 cursor.execute(
-                    'SELECT * FROM expenses WHERE id = ?',
-                    (existing['expense_id'],)
+                    _SQL_INSERT_IDEMPOTENCY_KEY,
+                    (idempotency_key, row[0], created_at)
                 )
-                row = cursor.fetchone()
-                if row:
-                    return jsonify(_row_to_expense(row)), 201
 
-        cursor.execute(
-            '''INSERT INTO expenses (amount_paise, category, description, date, created_at)
-               VALUES (?, ?, ?, ?, ?)''',
-            (amount_paise, category, description, date, created_at)
-        )
-        expense_id = cursor.lastrowid
-        if idempotency_key:
+    return jsonify(_row_to_expense(row)), 201
+
+
+@app.route('/expenses/bulk', methods=['POST'])
+def create_expenses_bulk():
+    """Create many expenses in one transaction. Body: JSON array of expense objects."""
+    init_db()
+    items = request.get_json(force=True, silent=True)
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty JSON array'}), 400
+
+    created_at = _utc_timestamp()
+    rows = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            return jsonify({'error': f'Item {i}: Invalid JSON'}), 400
+        fields, err = _validate_expense(item)
+        if err:
+            return jsonify({'error': f'Item {i}: {err}'}), 400
+        rows.append(fields + (created_at,))
+
+    # Per-item keys derive from the batch key, so retrying the same batch
+    # (same header or identical body) resolves every item to its first insert.
+    batch_key = _get_idempotency_key()
+    keys = [
+        hashlib.blake2b(b'%d' % i, digest_size=16, key=batch_key).digest()
+        for i in range(len(rows))
+    ]
+
+    with _write_transaction() as cursor:
+        existing = {}
+        for start in range(0, len(keys), _KEY_LOOKUP_CHUNK):
+            chunk = keys[start:start + _KEY_LOOKUP_CHUNK]
             cursor.execute(
-                'INSERT OR REPLACE INTO idempotency_keys (idempotency_key, expense_id, created_at) VALUES (?, ?, ?)',
-                (idempotency_key, expense_id, created_at)
+                _SQL_SELECT_BY_IDEMPOTENCY_KEYS.format(', '.join('?' * len(chunk))),
+                chunk
             )
-        conn.commit()
+            for r in cursor.fetchall():
+                existing[r[0]] = _row_to_expense(r[1:])
+        pending = [i for i, key in enumerate(keys) if key not in existing]
+
+        created = {}
+        if pending:
+            # AUTOINCREMENT ids only grow and we hold the write lock, so the
+            # new rows are exactly those above the current maximum id.
+            cursor.execute(_SQL_MAX_EXPENSE_ID)
+            max_id = cursor.fetchone()[0]
+            cursor.executemany(_SQL_INSERT_EXPENSE_NO_RETURNING, [rows[i] for i in pending])
+            cursor.execute(_SQL_SELECT_EXPENSES_AFTER_ID, (max_id,))
+            new_rows = cursor.fetchall()
+            cursor.executemany(
+                _SQL_INSERT_IDEMPOTENCY_KEY,
+                [(keys[i], r[0], created_at) for i, r in zip(pending, new_rows)]
+            )
+            created = {keys[i]: _row_to_expense(r) for i, r in zip(pending, new_rows)}
 
-        cursor.execute('SELECT * FROM expenses WHERE id = ?', (expense_id,))
-        row = cursor.fetchone()
-        return jsonify(_row_to_expense(row)), 201
+    return jsonify([existing.get(key) or created[key] for key in keys]), 201
 
 
 @app.route('/expenses', methods=['GET'])
@@ -180,23 +656,61 @@ def get_expenses():
     init_db()
     category = request.args.get('category', '').strip()
     sort = request.args.get('sort', '').strip()
+    search = _fts_query(request.args.get('q', ''))
 
-    query = 'SELECT * FROM expenses'
-    params = []
-    if category:
-        query += ' WHERE category = ?'
-        params.append(category)
-    if sort == 'date_asc':
-        query += ' ORDER BY date ASC, created_at ASC'
-    else:
-        query += ' ORDER BY date DESC, created_at DESC'  # default newest first
-
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+    # Default is newest first; only sort=date_asc flips the order.
+    query = _SQL_LIST_EXPENSES[(bool(category), sort == 'date_asc', bool(search))]
+    params = tuple(p for p in (category, search) if p)
+
+    conn = get_db()
+    cursor = conn.cursor()
+    # _fts_query() quotes every term, so a MATCH error here is a real fault.
+    cursor.execute(query, params)
+
+    # teardown_appcontext runs as soon as the view returns, before the body is
+    # streamed, so take the connection out of the context and hand it back
+    # only once the stream is finished (or the response is closed unread).
+    generation = g.pop('db_generation')
+    g.pop('db')
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            cursor.close()
+            _return_connection(conn, generation)
+
+    def generate():
+        # Stream the array in fetchmany() batches so memory stays flat no
+        # matter how many rows match.
+        try:
+            yield b'['
+            sep = b''
+            while True:
+                batch = cursor.fetchmany(_STREAM_BATCH_SIZE)
+                if not batch:
+                    break
+                yield sep + b','.join(
+                    # Keys in sorted order, matching jsonify() responses.
+                    orjson.dumps({
+                        'amount': amount_paise / 100,
+                        'category': cat,
+                        'created_at': created_at,
+                        'date': date,
+                        'description': desc,
+                        'id': id_,
+                    })
+                    for id_, amount_paise, cat, desc, date, created_at in batch
+                )
+                sep = b','
+            yield b']'
+        finally:
+            release()
 
-    return jsonify([_row_to_expense(r) for r in rows])
+    response = Response(stream_with_context(generate()), mimetype='application/json')
+    response.call_on_close(release)
+    return response
 
 
 if __name__ == '__main__':
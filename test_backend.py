@@ -4,12 +4,15 @@ Run with: pytest test_backend.py -v
 """
 
 import os
+import sqlite3
 import tempfile
+import threading
 
+import orjson
 import pytest
 
 import backend as backend_mod
-from backend import app, init_db, _parse_amount
+from backend import app, init_db, _is_valid_date, _parse_amount
 
 
 @pytest.fixture
@@ -19,6 +22,7 @@ def client():
     os.close(db_fd)
     original_db = backend_mod.DATABASE
     backend_mod.DATABASE = db_path
+    backend_mod._reset_pool()
 
     try:
         init_db()
@@ -26,8 +30,10 @@ def client():
             yield c
     finally:
         backend_mod.DATABASE = original_db
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+        backend_mod._reset_pool()
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.unlink(path)
 
 
 def test_create_and_get_expense(client):
@@ -80,6 +86,146 @@ def test_idempotency(client):
     assert len(expenses) == 1
 
 
+def test_bulk_create_and_retry(client):
+    """Bulk POST inserts all items once; an identical retry returns the same rows."""
+    payload = [
+        {'amount': 10, 'category': 'Food', 'description': 'a', 'date': '2025-02-16'},
+        {'amount': 20.5, 'category': 'Food', 'description': 'b', 'date': '2025-02-17'},
+        {'amount': '30', 'category': 'Transport', 'description': 'c', 'date': '2025-02-18'},
+    ]
+    r1 = client.post('/expenses/bulk', json=payload, content_type='application/json')
+    assert r1.status_code == 201
+    created = r1.get_json()
+    assert [e['amount'] for e in created] == [10, 20.5, 30]
+    assert [e['description'] for e in created] == ['a', 'b', 'c']
+
+    r2 = client.post('/expenses/bulk', json=payload, content_type='application/json')
+    assert r2.status_code == 201
+    assert [e['id'] for e in r2.get_json()] == [e['id'] for e in created]
+
+    assert len(client.get('/expenses').get_json()) == 3
+
+
+def test_bulk_rejects_invalid_item(client):
+    """Bulk POST validates every item and inserts nothing on error."""
+    r = client.post('/expenses/bulk', json=[
+        {'amount': 10, 'category': 'Food', 'description': 'a', 'date': '2025-02-16'},
+        {'amount': -1, 'category': 'Food', 'description': 'b', 'date': '2025-02-17'},
+    ], content_type='application/json')
+    assert r.status_code == 400
+    assert r.get_json()['error'].startswith('Item 1:')
+    assert client.get('/expenses').get_json() == []
+
+
+def test_get_streams_large_result(client):
+    """GET returns a valid JSON array when rows span several stream batches."""
+    payload = [
+        {'amount': i, 'category': 'X', 'description': str(i), 'date': '2025-02-18'}
+        for i in range(1200)
+    ]
+    r = client.post('/expenses/bulk', json=payload, content_type='application/json')
+    created = r.get_json()
+
+    # The retry looks up all 1200 keys, spanning several IN (...) chunks.
+    r = client.post('/expenses/bulk', json=payload, content_type='application/json')
+    assert r.get_json() == created
+
+    r = client.get('/expenses')
+    assert r.status_code == 200
+    assert len(r.get_json()) == 1200
+
+
+def test_concurrent_identical_posts(client):
+    """Identical POSTs from several threads still create exactly one expense."""
+    payload = {
+        'amount': 5, 'category': 'Food', 'description': 'Tea', 'date': '2025-02-18',
+    }
+    ids = []
+
+    def post():
+        with app.test_client() as c:
+            ids.append(c.post('/expenses', json=payload).get_json()['id'])
+
+    threads = [threading.Thread(target=post) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(ids)) == 1
+    assert len(client.get('/expenses').get_json()) == 1
+
+
+def test_connection_pool_reuses_connections(client, monkeypatch):
+    """Sequential requests on different threads reuse pooled connections."""
+    opened = []
+    real_connect = backend_mod._connect
+
+    def counting_connect():
+        opened.append(1)
+        return real_connect()
+
+    monkeypatch.setattr(backend_mod, '_connect', counting_connect)
+
+    def get():
+        with app.test_client() as c:
+            assert c.get('/expenses').get_json() == []
+
+    for _ in range(20):
+        t = threading.Thread(target=get)
+        t.start()
+        t.join()
+
+    assert len(opened) <= 1
+
+
+def test_idempotency_key_header(client):
+    """The same Idempotency-Key returns the first expense even if the body differs."""
+    headers = {'Idempotency-Key': 'order-42'}
+    r1 = client.post('/expenses', json={
+        'amount': 10, 'category': 'Food', 'description': 'a', 'date': '2025-02-18',
+    }, headers=headers)
+    r2 = client.post('/expenses', json={
+        'amount': 20, 'category': 'Food', 'description': 'b', 'date': '2025-02-18',
+    }, headers=headers)
+    assert r1.status_code == r2.status_code == 201
+    assert r2.get_json() == r1.get_json()
+    assert len(client.get('/expenses').get_json()) == 1
+
+
+def test_streamed_get_keeps_connection_checked_out(client):
+    """A streaming GET holds its connection until the body has been sent."""
+    payload = [
+        {'amount': i, 'category': 'X', 'description': str(i), 'date': '2025-02-18'}
+        for i in range(1200)
+    ]
+    client.post('/expenses/bulk', json=payload, content_type='application/json')
+    idle_before = backend_mod._POOL.qsize()
+
+    r = client.get('/expenses', buffered=False)
+    chunks = iter(r.response)
+    first, second = next(chunks), next(chunks)
+    assert first == b'['
+    # Mid-stream: the connection must not be back in the pool for others to use.
+    assert backend_mod._POOL.qsize() == idle_before - 1
+
+    body = first + second + b''.join(chunks)
+    r.close()
+    assert len(orjson.loads(body)) == 1200
+    assert backend_mod._POOL.qsize() == idle_before
+
+
+def test_blank_idempotency_key_header_is_ignored(client):
+    """A whitespace-only Idempotency-Key falls back to body hashing."""
+    headers = {'Idempotency-Key': ' \t'}
+    for amount in (1, 2):
+        r = client.post('/expenses', json={
+            'amount': amount, 'category': 'Food', 'description': 'x', 'date': '2025-02-18',
+        }, headers=headers)
+        assert r.get_json()['amount'] == amount
+    assert len(client.get('/expenses').get_json()) == 2
+
+
 def test_filter_by_category(client):
     """GET with category param filters results."""
     for cat, amt in [('Food', 10), ('Transport', 20), ('Food', 30)]:
@@ -94,6 +240,33 @@ def test_filter_by_category(client):
     assert all(e['category'] == 'Food' for e in expenses)
 
 
+def test_search_description(client):
+    """GET with q matches description words by prefix, case-insensitively."""
+    for desc, cat in [('Lunch at cafe', 'Food'), ('Bus ticket', 'Transport'), ('Cafe latte', 'Food')]:
+        client.post('/expenses', json={
+            'amount': 1, 'category': cat, 'description': desc, 'date': '2025-02-18',
+        }, content_type='application/json')
+
+    r = client.get('/expenses?q=caf')
+    assert sorted(e['description'] for e in r.get_json()) == ['Cafe latte', 'Lunch at cafe']
+
+    r = client.get('/expenses?q=bus&category=Food')
+    assert r.get_json() == []
+
+    r = client.get('/expenses?q="')
+    assert r.status_code == 200
+    assert r.get_json() == []
+
+    # Control characters are dropped, leaving an empty (unfiltered) search.
+    r = client.get('/expenses?q=%00')
+    assert r.status_code == 200
+    assert len(r.get_json()) == 3
+
+    r = client.get('/expenses?q=caf%00e')
+    assert r.status_code == 200
+    assert r.get_json() == []
+
+
 def test_sort_date_desc(client):
     """GET with sort=date_desc returns newest first."""
     for date in ['2025-02-16', '2025-02-18', '2025-02-17']:
@@ -132,6 +305,78 @@ def test_validation_missing_date(client):
     assert r.status_code == 400
 
 
+def test_validation_non_string_fields(client):
+    """POST rejects non-string text fields instead of dropping them."""
+    for field in ('category', 'description'):
+        payload = {'amount': 10, 'category': 'Food', 'description': 'x', 'date': '2025-02-18'}
+        payload[field] = 5
+        r = client.post('/expenses', json=payload, content_type='application/json')
+        assert r.status_code == 400
+        assert r.get_json()['error'] == f'{field.capitalize()} must be a string'
+
+    r = client.post('/expenses', json={
+        'amount': 10, 'category': 'Food', 'description': None, 'date': '2025-02-18',
+    }, content_type='application/json')
+    assert r.status_code == 201
+    assert r.get_json()['description'] == ''
+
+
+def test_validation_bad_date(client):
+    """POST rejects malformed or impossible dates."""
+    for date in ['18-02-2025', '2025-13-01', '2025-02-30', '\u0662\u0660\u0662\u0665-\u0660\u0661-\u0660\u0661']:
+        r = client.post('/expenses', json={
+            'amount': 10,
+            'category': 'Food',
+            'description': 'x',
+            'date': date,
+        }, content_type='application/json')
+        assert r.status_code == 400
+
+
+def test_cors_preflight(client):
+    """OPTIONS returns 204 with CORS headers; normal responses carry them too."""
+    r = client.options('/expenses')
+    assert r.status_code == 204
+    assert r.headers['Access-Control-Allow-Origin'] == '*'
+    assert 'Idempotency-Key' in r.headers['Access-Control-Allow-Headers']
+    assert client.get('/expenses').headers['Access-Control-Allow-Origin'] == '*'
+
+
+def test_maintenance_truncates_wal(client):
+    """Maintenance checkpoints the WAL back to zero bytes and gathers planner stats."""
+    client.post('/expenses', json={
+        'amount': 1, 'category': 'X', 'description': 'x', 'date': '2025-02-18',
+    }, content_type='application/json')
+    wal_path = backend_mod.DATABASE + '-wal'
+    assert os.path.getsize(wal_path) > 0
+
+    backend_mod._run_maintenance(optimize=True)
+    assert os.path.getsize(wal_path) == 0
+
+    conn = sqlite3.connect(backend_mod.DATABASE)
+    try:
+        stats = conn.execute("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'expenses'").fetchone()[0]
+    finally:
+        conn.close()
+    assert stats > 0
+
+
+def test_maintenance_skips_missing_database(tmp_path):
+    """Maintenance never creates a database file that does not exist."""
+    missing = tmp_path / 'gone.db'
+    with pytest.raises(sqlite3.OperationalError):
+        backend_mod._run_maintenance(database=str(missing))
+    assert not missing.exists()
+
+
+def test_is_valid_date():
+    """Unit test for date validation: ASCII digits only, whole string."""
+    assert _is_valid_date('2024-02-29')
+    assert not _is_valid_date('2025-02-29')
+    assert not _is_valid_date('2025-01-01\n')
+    assert not _is_valid_date('\u0662\u0660\u0662\u0665-\u0660\u0661-\u0660\u0661')
+
+
 def test_parse_amount():
     """Unit test for amount parsing."""
     assert _parse_amount(100)[0] == 10000
@@ -140,3 +385,19 @@ def test_parse_amount():
     assert _parse_amount(-1)[1] is not None
     assert _parse_amount(None)[1] is not None
     assert _parse_amount('abc')[1] is not None
+    assert _parse_amount(' 75 ')[0] == 7500
+    assert _parse_amount(2.675)[0] == 268
+    assert _parse_amount(float('nan'))[1] is not None
+    assert _parse_amount(True)[1] is not None
+
+
+def test_json_provider_honours_indent_and_sort_keys():
+    """app.json.dumps passes indent/sort_keys through to orjson."""
+    assert app.json.dumps({'b': 1, 'a': 2}, sort_keys=True) == '{"a":2,"b":1}'
+    assert app.json.dumps({'a': 1}, indent=2) == '{\n  "a": 1\n}'
+
+
+def test_json_provider_response_sorts_keys():
+    """jsonify() output keeps Flask's default sorted key order."""
+    with app.app_context():
+        assert app.json.response({'b': 1, 'a': 2}).get_data() == b'{"a":2,"b":1}'